@@ -13,6 +13,11 @@ from datetime import datetime, timedelta
 import pytz
 import plotly.graph_objects as go
 import time
+import os
+import json
+import hashlib
+import inspect
+import tempfile
 
 # ================= PAGE CONFIG =================
 st.set_page_config(
@@ -41,6 +46,9 @@ st.markdown("""
 IST = pytz.timezone("Asia/Kolkata")
 UTC = pytz.timezone("UTC")
 
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".backtest_checkpoints")
+CHECKPOINT_VERSION = 1  # Bump when checkpoint format or engine semantics change
+
 # ================= HELPER FUNCTIONS =================
 def calculate_position_size(entry, sl, balance, risk_pct):
     """Calculate position size based on risk"""
@@ -137,9 +145,105 @@ def get_15m_candle_after(df_15m, start_time):
         return None
     return df_15m[mask].iloc[0]
 
+# ================= CHECKPOINTS =================
+def fingerprint_days(df_5m, df_15m, dates):
+    """Chained hash of the candle data up to the end of each day"""
+    cols = ['open', 'high', 'low', 'close', 'volume']
+    bounds_5m = df_5m.index.searchsorted(dates[1:])
+    bounds_15m = df_15m.index.searchsorted(dates[1:])
+    
+    fingerprints = []
+    digest = b""
+    start_5m, start_15m = 0, 0
+    for i in range(len(dates)):
+        end_5m = bounds_5m[i] if i < len(dates) - 1 else len(df_5m)
+        end_15m = bounds_15m[i] if i < len(dates) - 1 else len(df_15m)
+        
+        h = hashlib.sha1(digest)
+        for df, a, b in ((df_5m, start_5m, end_5m), (df_15m, start_15m, end_15m)):
+            chunk = df.iloc[a:b]
+            h.update(chunk.index.asi8.tobytes())
+            h.update(np.ascontiguousarray(chunk[cols].to_numpy(dtype=float)).tobytes())
+        digest = h.digest()
+        fingerprints.append(digest.hex())
+        
+        start_5m, start_15m = end_5m, end_15m
+    
+    return fingerprints
+
+def strategy_fingerprint():
+    """Hash of the engine version and the source of the strategy rules"""
+    h = hashlib.sha1(str(CHECKPOINT_VERSION).encode())
+    for func in (calculate_position_size, weekday_allowed, get_pivot_candle,
+                 get_5m_candles_after, get_15m_candle_after, run_backtest):
+        h.update(inspect.getsource(func).encode())
+    return h.hexdigest()
+
+def checkpoint_path(checkpoint_dir, start_time, initial_capital, risk_percent, tp_multiple):
+    """Checkpoint file for a given start candle and parameter set"""
+    key = f"{start_time.isoformat()}|{initial_capital}|{risk_percent}|{tp_multiple}"
+    name = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(checkpoint_dir, f"backtest_{name}.json")
+
+def _encode_checkpoint_value(obj):
+    """JSON encoder for timestamps stored in trades and the equity curve"""
+    if isinstance(obj, pd.Timestamp):
+        return {"__timestamp__": obj.isoformat()}
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+def _decode_checkpoint_value(obj):
+    """JSON decoder restoring timestamps in IST"""
+    if "__timestamp__" in obj:
+        return pd.Timestamp(obj["__timestamp__"]).tz_convert(IST)
+    return obj
+
+def load_checkpoint(path):
+    """Load a saved checkpoint, or None if missing/unreadable"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f, object_hook=_decode_checkpoint_value)
+    except Exception:
+        return None
+
+def save_checkpoint(path, checkpoint):
+    """Atomically write a checkpoint to disk"""
+    checkpoint_dir = os.path.dirname(path)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    # Unique temp file so concurrent sessions never share one
+    fd, tmp_path = tempfile.mkstemp(dir=checkpoint_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(checkpoint, f, default=_encode_checkpoint_value)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def find_resume_point(checkpoint, dates, fingerprints):
+    """Return the index of the last checkpointed day still valid for this data, or -1"""
+    if checkpoint is None:
+        return -1
+    
+    for i in range(len(checkpoint['days']) - 1, -1, -1):
+        day = checkpoint['days'][i]
+        # Never resume past the last day of the new data - it may still be incomplete
+        if i >= len(dates) - 1:
+            continue
+        if dates[i] == day['date'] and fingerprints[i] == day['fingerprint']:
+            return i
+    return -1
+
 # ================= BACKTESTING ENGINE =================
-def run_backtest(df_5m, df_15m, initial_capital, risk_percent, tp_multiple):
-    """Run the backtesting engine"""
+def run_backtest(df_5m, df_15m, initial_capital, risk_percent, tp_multiple, checkpoint_dir=None):
+    """Run the backtesting engine
+    
+    If checkpoint_dir is given, the state at the end of every complete day is
+    saved there and a later run over an extended range resumes from the last
+    day whose candle data is unchanged.
+    """
     trades = []
     balance = initial_capital
     equity_curve = [{"date": df_5m.index[0], "balance": balance}]
@@ -147,15 +251,53 @@ def run_backtest(df_5m, df_15m, initial_capital, risk_percent, tp_multiple):
     dates = df_5m.index.normalize().unique()
     current_day_s1_direction = None
     
+    # ============ RESUME FROM CHECKPOINT ============
+    day_states = []
+    start_idx = 0
+    if checkpoint_dir is not None:
+        fingerprints = fingerprint_days(df_5m, df_15m, dates)
+        path = checkpoint_path(checkpoint_dir, df_5m.index[0], initial_capital, risk_percent, tp_multiple)
+        strategy = strategy_fingerprint()
+        checkpoint = load_checkpoint(path)
+        # Checkpoints from different strategy rules are stale - ignore them
+        if checkpoint is not None and checkpoint.get('strategy') != strategy:
+            checkpoint = None
+        resume_idx = find_resume_point(checkpoint, dates, fingerprints)
+        
+        if resume_idx >= 0:
+            state = checkpoint['days'][resume_idx]
+            day_states = checkpoint['days'][:resume_idx + 1]
+            trades = checkpoint['trades'][:state['trade_count']]
+            equity_curve = checkpoint['equity_curve'][:state['equity_count']]
+            balance = state['balance']
+            start_idx = resume_idx + 1
+            st.caption(f"♻️ Resumed from checkpoint: {start_idx} of {len(dates)} days already simulated")
+    
     progress_bar = st.progress(0)
-    total_days = len(dates)
+    total_days = len(dates) - start_idx
     
-    for idx, date in enumerate(dates):
+    for idx in range(start_idx, len(dates)):
+        date = dates[idx]
         day_of_week = date.weekday()
+        
+        # Previous day is complete - record its end-of-day state
+        # (recorded here because the session blocks below may `continue`)
+        if checkpoint_dir is not None and idx > start_idx:
+            day_states.append({
+                'date': dates[idx - 1],
+                'fingerprint': fingerprints[idx - 1],
+                'balance': balance,
+                # Kept for inspection only: each day starts with no S1 direction,
+                # so resuming at a day boundary never needs to restore it
+                's1_direction': current_day_s1_direction,
+                'trade_count': len(trades),
+                'equity_count': len(equity_curve)
+            })
+        
         current_day_s1_direction = None
         
         # Update progress
-        progress_bar.progress((idx + 1) / total_days)
+        progress_bar.progress((idx - start_idx + 1) / total_days)
         
         # ============ SESSION 1 ============
         if weekday_allowed("S1", day_of_week):
@@ -372,6 +514,20 @@ def run_backtest(df_5m, df_15m, initial_capital, risk_percent, tp_multiple):
                                     equity_curve.append({"date": exit_time, "balance": balance})
     
     progress_bar.empty()
+    
+    # The last day is left out of the checkpoint: its candles may still be incomplete.
+    # A shorter run (earlier end date) keeps the longer stored history.
+    if checkpoint_dir is not None and (checkpoint is None or len(day_states) >= len(checkpoint['days'])):
+        try:
+            save_checkpoint(path, {
+                'strategy': strategy,
+                'days': day_states,
+                'trades': trades,
+                'equity_curve': equity_curve
+            })
+        except OSError as e:
+            st.warning(f"⚠️ Could not save backtest checkpoint: {e}")
+    
     return trades, equity_curve, balance
 
 # ================= MAIN DASHBOARD =================
@@ -409,8 +565,12 @@ def main():
                     "End Date",
                     datetime.now().date()
                 )
+            st.caption("♻️ Keep the start date fixed and extend the end date - "
+                       "reruns resume from checkpoints and only simulate the new days.")
         else:
             custom_start, custom_end = None, None
+            st.caption("ℹ️ Presets roll their start date forward and always run in full. "
+                       "Use Custom with a fixed start date to resume from checkpoints.")
         
         # Capital & Risk
         st.markdown("### 💰 Capital & Risk")
@@ -482,7 +642,8 @@ def main():
         # Run backtest
         with st.spinner("🔍 Running backtest..."):
             trades, equity_curve, final_balance = run_backtest(
-                df_5m, df_15m, initial_capital, risk_percent, tp_multiple
+                df_5m, df_15m, initial_capital, risk_percent, tp_multiple,
+                checkpoint_dir=CHECKPOINT_DIR if period_option == "Custom" else None
             )
         
         if len(trades) == 0:
@@ -572,7 +733,7 @@ def main():
         - **3 Months** - Good sample (~150 trades)
         - **6 Months** - Solid validation (~300 trades)
         - **1 Year** - Full strategy test (~600+ trades)
-        - **Custom** - Any range you want
+        - **Custom** - Any range you want (reruns resume from checkpoints)
         
         Click **RUN BACKTEST** to start!
         """)